@@ -1,12 +1,39 @@
+# Patch blocking stdlib I/O before anything else imports it so upstream AI calls yield
+from gevent import monkey
+monkey.patch_all()
+
+import orjson
 from flask import Flask, request, jsonify
-from flask_cors import CORS
+from flask.json.provider import JSONProvider
+from gevent.pywsgi import WSGIServer
 from db import init_db, shutdown_session
 from services import AIService, DatabaseService
-from models import Provider, Model, APIKey
+from models import PROVIDER_VALUES, PROVIDER_LIST
 from config import Config
 
+class ORJSONProvider(JSONProvider):
+    """Serve request parsing and jsonify responses through orjson."""
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
 app = Flask(__name__)
-CORS(app, resources={r"/*": {"origins": "*"}})
+app.json = ORJSONProvider(app)
+
+# Static wildcard CORS policy; Flask answers OPTIONS preflights automatically
+CORS_HEADERS = {
+    "Access-Control-Allow-Origin": "*",
+    "Access-Control-Allow-Headers": "*",
+    "Access-Control-Allow-Methods": "GET, POST, OPTIONS"
+}
+
+@app.after_request
+def add_cors_headers(resp):
+    resp.headers.update(CORS_HEADERS)
+    return resp
 
 def create_app():
     with app.app_context():
@@ -35,7 +62,7 @@ def index():
 
 @app.route('/ask', methods=['POST'])
 def ask():
-    data = request.json
+    data = request.get_json(cache=True)
     if not data or 'question' not in data or 'webpage_content' not in data:
         return jsonify({"error": "Missing required fields"}), 400
 
@@ -56,7 +83,7 @@ def ask():
 
 @app.route('/save', methods=['POST'])
 def save():
-    data = request.json
+    data = request.get_json(cache=True)
     if not all(k in data for k in ['webpage_url', 'question', 'answer']):
         return jsonify({"error": "Missing required fields"}), 400
 
@@ -85,7 +112,7 @@ def get_saved():
 
 @app.route('/delete', methods=['POST'])
 def delete():
-    data = request.json
+    data = request.get_json(cache=True)
     if 'id' not in data:
         return jsonify({"error": "Missing id field"}), 400
 
@@ -96,7 +123,7 @@ def delete():
 
 @app.route('/update_api_key', methods=['POST'])
 def update_api_key():
-    data = request.json
+    data = request.get_json(cache=True)
     required_fields = ['key', 'provider', 'model']
     if not all(field in data for field in required_fields):
         return jsonify({"error": f"Missing required fields. Required: {required_fields}"}), 400
@@ -119,15 +146,11 @@ def get_api_key():
     if not provider:
         return jsonify({"error": "Provider parameter is required"}), 400
         
-    if provider not in [p.value for p in Provider]:
-        return jsonify({"error": f"Invalid provider. Must be one of: {[p.value for p in Provider]}"}), 400
+    if provider not in PROVIDER_VALUES:
+        return jsonify({"error": f"Invalid provider. Must be one of: {PROVIDER_LIST}"}), 400
 
     # Query the database for the key
-    query = APIKey.query.filter_by(provider=provider, is_valid=True)
-    if user_id:
-        query = query.filter_by(user_id=user_id)
-    
-    api_key = query.first()
+    api_key = AIService.get_api_key(provider, user_id)
     
     if api_key:
         return jsonify({
@@ -139,4 +162,4 @@ def get_api_key():
     return jsonify({"error": f"No valid API key found for provider: {provider}"}), 404
 
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=51034)
+    WSGIServer(('0.0.0.0', 51034), app).serve_forever()
@@ -1,6 +1,8 @@
 import os
 from pathlib import Path
 
+__all__ = ["Config", "BASE_DIR"]
+
 BASE_DIR = Path(__file__).resolve().parent
 
 class Config:
@@ -16,6 +18,17 @@ class Config:
     MAX_TOKENS = 1000
     TEMPERATURE = 0.7
     
+    # Upstream HTTP client settings
+    PROVIDER_CACHE_SIZE = 32  # cached provider clients (one per API key)
+    HTTP_MAX_CONNECTIONS = 100
+    HTTP_MAX_KEEPALIVE = 20
+    HTTP_TIMEOUT = 120  # seconds; covers a MAX_TOKENS completion from the slower models
+    HTTP_CONNECT_TIMEOUT = 5  # seconds
+    
+    # In-process cache for API key lookups
+    API_KEY_CACHE_SIZE = 128
+    API_KEY_CACHE_TTL = 60  # seconds
+    
     # Provider settings
     SUPPORTED_PROVIDERS = {
         "openai": ["gpt-4", "gpt-3.5-turbo"],
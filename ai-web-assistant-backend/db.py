@@ -1,17 +1,56 @@
-from sqlalchemy import create_engine
+import sqlite3
+from sqlalchemy import create_engine, event, func, literal_column, select, update
+from sqlalchemy.engine import Engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, scoped_session
+from sqlalchemy.schema import CreateIndex
+from sqlalchemy.pool import QueuePool
 from config import Config
 
-engine = create_engine(Config.SQLALCHEMY_DATABASE_URI)
+engine = create_engine(
+    Config.SQLALCHEMY_DATABASE_URI,
+    connect_args={"check_same_thread": False},
+    poolclass=QueuePool,
+    pool_size=5,
+    max_overflow=10,
+    query_cache_size=1200,
+    future=True
+)
 db_session = scoped_session(sessionmaker(bind=engine))
 
 Base = declarative_base()
 Base.query = db_session.query_property()
 
+@event.listens_for(Engine, "connect")
+def set_sqlite_pragma(dbapi_connection, connection_record):
+    """Apply WAL journaling and cache tuning to every new SQLite connection."""
+    if not isinstance(dbapi_connection, sqlite3.Connection):
+        return
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.execute("PRAGMA cache_size=-64000")
+    cursor.execute("PRAGMA mmap_size=268435456")
+    cursor.close()
+
 def init_db():
     import models
     Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        # Older databases can hold several active keys per (provider, user); keep the newest
+        # so the ix_active_key unique index can be built
+        APIKey = models.APIKey
+        newest = select(func.max(APIKey.id)).where(APIKey.is_valid == True).group_by(
+            APIKey.provider, func.coalesce(APIKey.user_id, literal_column("''"))
+        )
+        conn.execute(
+            update(APIKey).where(APIKey.is_valid == True, APIKey.id.not_in(newest)).values(is_valid=False)
+        )
+        # create_all skips tables that already exist, so add any new indexes explicitly
+        for table in Base.metadata.sorted_tables:
+            for index in table.indexes:
+                conn.execute(CreateIndex(index, if_not_exists=True))
 
 def shutdown_session(exception=None):
     db_session.remove()
\ No newline at end of file
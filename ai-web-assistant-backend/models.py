@@ -1,5 +1,5 @@
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, ForeignKey, Index, func, literal_column
 from sqlalchemy.orm import relationship
 from db import Base
 
@@ -14,6 +14,12 @@ class Model(str, Enum):
     GPT35 = "gpt-3.5-turbo"
     CLAUDE = "claude-3-sonnet-20240229"
 
+# Precomputed lookups for request validation
+PROVIDER_VALUES = frozenset(p.value for p in Provider)
+MODEL_VALUES = frozenset(m.value for m in Model)
+PROVIDER_LIST = sorted(PROVIDER_VALUES)
+MODEL_LIST = sorted(MODEL_VALUES)
+
 class APIKey(Base):
     __tablename__ = 'api_keys'
     
@@ -26,8 +32,17 @@ class APIKey(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+    __table_args__ = (
+        Index("ix_apikey_provider_valid_user", "provider", "is_valid", "user_id"),
+        # At most one active key per (provider, user); also the conflict target for key rotation
+        Index("ix_active_key", provider, func.coalesce(user_id, literal_column("''")), unique=True, sqlite_where=is_valid == True),
+    )
+
 class QAPair(Base):
     __tablename__ = 'qa_pairs'
+    __table_args__ = (
+        Index("ix_qa_url", "webpage_url"),
+    )
     
     id = Column(Integer, primary_key=True)
     webpage_url = Column(String(2048), nullable=False)
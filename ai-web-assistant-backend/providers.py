@@ -1,9 +1,31 @@
+import hashlib
+import threading
 from abc import ABC, abstractmethod
-from typing import Dict, Optional
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+from types import ModuleType
+import anthropic
+import openai
 from openai import OpenAI
 from anthropic import Anthropic
 from config import Config
 
+def _http_client(sdk: ModuleType):
+    """HTTP/2 client with pooled keep-alive connections, one per cached provider.
+
+    Built from the SDK's DefaultHttpxClient so its defaults (keep-alive socket options,
+    proxy handling, redirects) are kept. Limits and Timeout take their types from the
+    SDK's own defaults, since newer SDK releases are built on httpx2 rather than httpx.
+    """
+    return sdk.DefaultHttpxClient(
+        http2=True,
+        limits=type(sdk.DEFAULT_CONNECTION_LIMITS)(
+            max_connections=Config.HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=Config.HTTP_MAX_KEEPALIVE
+        ),
+        timeout=type(sdk.DEFAULT_TIMEOUT)(Config.HTTP_TIMEOUT, connect=Config.HTTP_CONNECT_TIMEOUT)
+    )
+
 class AIProvider(ABC):
     @abstractmethod
     def ask_question(self, question: str, context: str, model: Optional[str] = None) -> Dict:
@@ -13,20 +35,20 @@ class AIProvider(ABC):
         """Truncate text to a maximum number of characters while trying to keep complete sentences."""
         if len(text) <= max_chars:
             return text
-        
-        truncated = text[:max_chars]
-        last_period = truncated.rfind('.')
-        last_question = truncated.rfind('?')
-        last_exclamation = truncated.rfind('!')
-        
-        cut_point = max(last_period, last_question, last_exclamation)
+
+        # Scan backwards from max_chars, each rfind bounded to after the best cut so far,
+        # so the scans stop at the last sentence end instead of covering the whole prefix.
+        # Working on str directly avoids encoding (copying) the whole, possibly multi-MB, context.
+        cut_point = -1
+        for terminator in '.?!':
+            cut_point = max(cut_point, text.rfind(terminator, cut_point + 1, max_chars))
         if cut_point > 0:
             return text[:cut_point + 1]
-        return truncated + "..."
+        return text[:max_chars] + "..."
 
 class OpenAIProvider(AIProvider):
     def __init__(self, api_key: str):
-        self.client = OpenAI(api_key=api_key)
+        self.client = OpenAI(api_key=api_key, http_client=_http_client(openai))
 
     def ask_question(self, question: str, context: str, model: Optional[str] = None) -> Dict:
         try:
@@ -46,7 +68,7 @@ class OpenAIProvider(AIProvider):
 
 class AnthropicProvider(AIProvider):
     def __init__(self, api_key: str):
-        self.client = Anthropic(api_key=api_key)
+        self.client = Anthropic(api_key=api_key, http_client=_http_client(anthropic))
 
     def ask_question(self, question: str, context: str, model: Optional[str] = None) -> Dict:
         try:
@@ -62,6 +84,13 @@ class AnthropicProvider(AIProvider):
         except Exception as e:
             return {"error": str(e)}
 
+# LRU of provider instances keyed by (provider, key digest) so each API key keeps one warm client
+_CLIENTS: "OrderedDict[Tuple[str, str], AIProvider]" = OrderedDict()
+_CLIENTS_LOCK = threading.Lock()
+
+def _client_key(provider_type: str, api_key: str) -> Tuple[str, str]:
+    return provider_type.lower(), hashlib.sha256(api_key.encode()).hexdigest()
+
 class AIProviderFactory:
     @staticmethod
     def create_provider(provider_type: str, api_key: str) -> Optional[AIProvider]:
@@ -71,6 +100,28 @@ class AIProviderFactory:
         }
         
         provider_class = providers.get(provider_type.lower())
-        if provider_class:
-            return provider_class(api_key)
-        return None
\ No newline at end of file
+        if not provider_class:
+            return None
+
+        cache_key = _client_key(provider_type, api_key)
+        with _CLIENTS_LOCK:
+            instance = _CLIENTS.get(cache_key)
+            if instance is None:
+                instance = provider_class(api_key)
+                _CLIENTS[cache_key] = instance
+                # Evicted clients are only dropped, not closed: an in-flight /ask may still hold one
+                while len(_CLIENTS) > Config.PROVIDER_CACHE_SIZE:
+                    _CLIENTS.popitem(last=False)
+            else:
+                _CLIENTS.move_to_end(cache_key)
+        return instance
+
+    @staticmethod
+    def invalidate(provider_type: str, api_key: str) -> None:
+        """Drop the cached client for a key that is no longer valid.
+
+        The client is not closed here since /ask calls already holding it may still be
+        running; it is released once the last of them drops its reference.
+        """
+        with _CLIENTS_LOCK:
+            _CLIENTS.pop(_client_key(provider_type, api_key), None)
\ No newline at end of file
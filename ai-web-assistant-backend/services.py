@@ -1,16 +1,59 @@
-from typing import Optional, List, Dict
-from models import APIKey, QAPair, Provider, Model
+import threading
+from datetime import datetime
+from typing import NamedTuple, Optional, List, Dict
+from cachetools import TTLCache
+from sqlalchemy import select, func, literal_column
+from sqlalchemy.dialects.sqlite import insert
+from models import APIKey, QAPair, PROVIDER_VALUES, MODEL_VALUES, PROVIDER_LIST, MODEL_LIST
 from db import db_session
 from config import Config
 from providers import AIProviderFactory
 
+__all__ = ["AIService", "DatabaseService", "CachedAPIKey"]
+
+class CachedAPIKey(NamedTuple):
+    key: str
+    provider: str
+    model: str
+    user_id: Optional[str]
+
+# Valid API keys by (provider, user_id); cleared for the affected entries on update_api_key
+_KEY_CACHE = TTLCache(maxsize=Config.API_KEY_CACHE_SIZE, ttl=Config.API_KEY_CACHE_TTL)
+_KEY_CACHE_LOCK = threading.Lock()
+# Bumped on every invalidation so a lookup that raced with update_api_key does not re-cache the old key
+_key_cache_generation = 0
+
+def _invalidate_cached_key(provider: str, user_id: Optional[str]) -> None:
+    global _key_cache_generation
+    # Lookups without a user_id match any user's key, so that entry is always dropped too
+    with _KEY_CACHE_LOCK:
+        _key_cache_generation += 1
+        _KEY_CACHE.pop((provider, user_id), None)
+        _KEY_CACHE.pop((provider, None), None)
+
 class AIService:
     @staticmethod
-    def get_api_key(provider: str, user_id: Optional[str] = None) -> Optional[APIKey]:
-        query = APIKey.query.filter_by(provider=provider, is_valid=True)
+    def get_api_key(provider: str, user_id: Optional[str] = None) -> Optional[CachedAPIKey]:
+        user_id = user_id or None
+        cache_key = (provider, user_id)
+        with _KEY_CACHE_LOCK:
+            cached = _KEY_CACHE.get(cache_key)
+            generation = _key_cache_generation
+        if cached:
+            return cached
+
+        stmt = select(APIKey).where(APIKey.provider == provider, APIKey.is_valid == True)
         if user_id:
-            query = query.filter_by(user_id=user_id)
-        return query.first()
+            stmt = stmt.where(APIKey.user_id == user_id)
+        api_key = db_session.execute(stmt.limit(1)).scalar_one_or_none()
+        if not api_key:
+            return None
+
+        cached = CachedAPIKey(api_key.key, api_key.provider, api_key.model, api_key.user_id)
+        with _KEY_CACHE_LOCK:
+            if generation == _key_cache_generation:
+                _KEY_CACHE[cache_key] = cached
+        return cached
 
     @staticmethod
     def ask_question(question: str, context: str, provider: str = "openai", model: Optional[str] = None, user_id: Optional[str] = None) -> Dict:
@@ -24,6 +67,8 @@ class AIService:
         
         # Get API key
         api_key = AIService.get_api_key(provider, user_id)
+        # Return the pooled connection now rather than holding it through the upstream call
+        db_session.remove()
         if not api_key:
             return {"error": f"No valid API key found for provider: {provider}"}
         
@@ -35,7 +80,7 @@ class AIService:
         # Use the model from the API key if none specified
         model_to_use = model or api_key.model
         
-        # Make the API call
+        # Make the API call; concurrent calls for the same key share the cached client's connection pool
         return provider_instance.ask_question(question, context, model_to_use)
 
 class DatabaseService:
@@ -59,20 +104,24 @@ class DatabaseService:
     @staticmethod
     def get_qa_pairs(webpage_url: str) -> List[Dict]:
         try:
-            qa_pairs = QAPair.query.filter_by(webpage_url=webpage_url).all()
+            # Select only the serialized columns so the large context column is never loaded
+            stmt = select(
+                QAPair.id, QAPair.question, QAPair.answer, QAPair.created_at
+            ).where(QAPair.webpage_url == webpage_url)
+            rows = db_session.execute(stmt).all()
             return [{
-                "id": qa.id,
-                "question": qa.question,
-                "answer": qa.answer,
-                "created_at": qa.created_at.isoformat()
-            } for qa in qa_pairs]
+                "id": row.id,
+                "question": row.question,
+                "answer": row.answer,
+                "created_at": row.created_at.isoformat()
+            } for row in rows]
         except Exception as e:
             return {"error": str(e)}
 
     @staticmethod
     def delete_qa_pair(qa_id: int) -> Dict:
         try:
-            qa_pair = QAPair.query.get(qa_id)
+            qa_pair = db_session.get(QAPair, qa_id)
             if not qa_pair:
                 return {"error": "QA pair not found"}
             db_session.delete(qa_pair)
@@ -86,28 +135,45 @@ class DatabaseService:
     def update_api_key(key: str, provider: str, model: str, user_id: str = None) -> Dict:
         try:
             # Validate provider and model
-            if provider not in [p.value for p in Provider]:
-                return {"error": f"Invalid provider. Must be one of: {[p.value for p in Provider]}"}
-            if model not in [m.value for m in Model]:
-                return {"error": f"Invalid model. Must be one of: {[m.value for m in Model]}"}
-            
-            # Invalidate existing keys for this user and provider if user_id is provided
-            if user_id:
-                APIKey.query.filter_by(user_id=user_id, provider=provider).update({"is_valid": False})
-            else:
-                # If no user_id, invalidate all keys without user_id for this provider
-                APIKey.query.filter_by(user_id=None, provider=provider).update({"is_valid": False})
+            if provider not in PROVIDER_VALUES:
+                return {"error": f"Invalid provider. Must be one of: {PROVIDER_LIST}"}
+            if model not in MODEL_VALUES:
+                return {"error": f"Invalid model. Must be one of: {MODEL_LIST}"}
             
-            # Create new key
-            api_key = APIKey(
+            user_id = user_id or None
+            # Same owner expression as ix_active_key, so NULL and legacy '' user_ids match alike
+            owner = func.coalesce(APIKey.user_id, literal_column("''"))
+
+            # Drop the cached client for the key being replaced
+            stale_key = db_session.execute(
+                select(APIKey.key).where(
+                    APIKey.provider == provider, owner == (user_id or ''), APIKey.is_valid == True
+                ).limit(1)
+            ).scalar_one_or_none()
+            if stale_key:
+                AIProviderFactory.invalidate(provider, stale_key)
+
+            # Insert the key, or replace the active one for this user and provider (ix_active_key)
+            stmt = insert(APIKey).values(
                 key=key,
                 user_id=user_id,
                 provider=provider,
-                model=model
+                model=model,
+                is_valid=True
             )
-            db_session.add(api_key)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[APIKey.provider, owner],
+                index_where=APIKey.is_valid == True,
+                set_={
+                    "key": stmt.excluded.key,
+                    "model": stmt.excluded.model,
+                    "updated_at": datetime.utcnow()
+                }
+            ).returning(APIKey.id)
+            api_key_id = db_session.execute(stmt).scalar_one()
             db_session.commit()
-            return {"success": True, "id": api_key.id}
+            _invalidate_cached_key(provider, user_id)
+            return {"success": True, "id": api_key_id}
         except Exception as e:
             db_session.rollback()
             return {"error": str(e)}
\ No newline at end of file